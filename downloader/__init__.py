@@ -0,0 +1,18 @@
+"""
+Async scraping and download API for MangaBuddy, built on a shared httpx
+client. These are the only supported entry points; there is no blocking
+requests-based variant.
+"""
+
+from downloader.scraper import get_manga_details, get_image_urls
+from downloader.download import download_image, download_chapter, download_manga
+from downloader.utils import create_http_client
+
+__all__ = [
+    "get_manga_details",
+    "get_image_urls",
+    "download_image",
+    "download_chapter",
+    "download_manga",
+    "create_http_client",
+]
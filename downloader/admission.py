@@ -0,0 +1,66 @@
+import asyncio
+
+from config import MAX_IMAGE_THREADS
+
+
+class AdmissionController:
+    """
+    Process-wide limiter for in-flight image requests.
+
+    Unlike a per-chapter Semaphore, a single controller keeps the total
+    in-flight count bounded no matter how many chapters download at once,
+    and its limit can be resized at runtime (shrunk on HTTP 429, grown
+    back after sustained success) without re-creating any primitive.
+    """
+
+    def __init__(self, limit: int, min_limit: int = 1):
+        self._max_limit = limit
+        self._min_limit = min_limit
+        self._limit = limit
+        self._active = 0
+        self._successes = 0
+        self._condition = asyncio.Condition(asyncio.Lock())
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+
+    async def release(self):
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    async def throttle(self):
+        """
+        Shrinks the limit by one after a rate-limit response.
+        """
+        async with self._condition:
+            if self._limit > self._min_limit:
+                self._limit -= 1
+            self._successes = 0
+
+    async def record_success(self):
+        """
+        Grows the limit back toward its maximum after a full round of
+        successful downloads at the current limit.
+        """
+        async with self._condition:
+            if self._limit >= self._max_limit:
+                return
+            self._successes += 1
+            if self._successes >= self._limit:
+                self._successes = 0
+                self._limit += 1
+                self._condition.notify_all()
+
+
+# Single process-wide controller shared by all chapters
+admission = AdmissionController(MAX_IMAGE_THREADS)
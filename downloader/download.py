@@ -1,18 +1,44 @@
 import os
 import re
+import random
 import asyncio
+import zipfile
+import functools
 
+import aiofiles
 import httpx
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TransferSpeedColumn, TimeRemainingColumn
 
 from downloader.scraper import get_image_urls, BASE_HEADERS
-from config import MAX_IMAGE_THREADS, RETRY_ATTEMPTS, DOWNLOAD_PATH, HTTP_TIMEOUT
+from downloader.admission import admission
+from downloader.metadata import create_comic_info_xml
+from downloader.utils import create_http_client, EtagCache
+from config import MAX_CHAPTER_THREADS, RETRY_ATTEMPTS, DOWNLOAD_PATH
 
 console = Console()
 
+_SANITIZE_RE = re.compile(r'[\\/*?:"<>|]')
+
+# Cached because the same manga title is sanitized once per chapter
+@functools.lru_cache(maxsize=4096)
 def sanitize_filename(name: str) -> str:
-    return re.sub(r'[\\/*?:"<>|]', "_", name)
+    return _SANITIZE_RE.sub("_", name)
+
+
+# 64 KiB chunks keep per-request memory flat and align with fs block sizes
+DOWNLOAD_CHUNK_SIZE = 65536
+
+# Bodies up to this size (the typical manga page) are gathered and written
+# with a single write call; larger bodies stream chunk by chunk to cap memory
+SMALL_IMAGE_THRESHOLD = 524288
+
+# Cap on exponential backoff between retries
+MAX_BACKOFF_SECONDS = 30.0
+
+# Advance the progress bar in batches; a Rich re-render per image is
+# measurable CPU when hundreds of pages complete in parallel
+PROGRESS_BATCH = 4
 
 
 async def download_image(
@@ -21,9 +47,88 @@ async def download_image(
     path: str,
     chapter_url: str,
     retries: int = RETRY_ATTEMPTS,
+    etag_cache: EtagCache | None = None,
 ):
     """
     Downloads an image from a URL to a specified path with retries.
+
+    The response body is streamed to disk in chunks so peak memory stays at
+    one chunk per in-flight download instead of one full image. Bytes go to
+    a .part file that is atomically renamed on success, so a crash or failed
+    retry never leaves a truncated image under the final name. When an ETag
+    is cached and the file is already on disk, a conditional GET lets the
+    CDN answer 304 instead of resending the body.
+    """
+    tmp_path = path + ".part"
+    for attempt in range(retries):
+        try:
+            headers = BASE_HEADERS.copy()
+            headers["Referer"] = chapter_url
+            etag = etag_cache.get(url) if etag_cache else None
+            if etag and os.path.exists(path):
+                headers["If-None-Match"] = etag
+
+            bytes_written = 0
+            response_etag = None
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    # Image on disk is still current; nothing to write
+                    await admission.record_success()
+                    return True
+                response.raise_for_status()
+                response_etag = response.headers.get("ETag")
+                buffered: list[bytes] | None = []
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        bytes_written += len(chunk)
+                        if buffered is None:
+                            await f.write(chunk)
+                        else:
+                            buffered.append(chunk)
+                            if bytes_written > SMALL_IMAGE_THRESHOLD:
+                                # Too big to batch; flush and stream the rest
+                                await f.write(b"".join(buffered))
+                                buffered = None
+                    if buffered:
+                        await f.write(b"".join(buffered))
+            if not bytes_written:
+                raise ValueError("Empty image payload")
+            os.replace(tmp_path, path)
+            if etag_cache:
+                etag_cache.set(url, response_etag)
+            await admission.record_success()
+            return True
+        except Exception as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            if status == 429:
+                await admission.throttle()
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                # Client errors other than timeout/rate-limit won't succeed on retry
+                console.print(f"[bold red]Unrecoverable HTTP {status} for {url}. Not retrying.[/bold red]")
+                return False
+            console.print(f"[bold yellow]Attempt {attempt + 1}/{retries} failed for {url}:[/bold yellow] {e}")
+            if attempt < retries - 1:
+                # Jitter spreads retries out so parallel pages don't hammer the CDN in lockstep
+                await asyncio.sleep(min(MAX_BACKOFF_SECONDS, (2 ** attempt) * (1 + random.random() * 0.5)))
+            else:
+                console.print(f"[bold red]Failed to download image from {url} after {retries} attempts.[/bold red]")
+                return False
+
+
+async def fetch_image_bytes(
+    client: httpx.AsyncClient,
+    url: str,
+    chapter_url: str,
+    retries: int = RETRY_ATTEMPTS,
+) -> bytes | None:
+    """
+    Fetches one image into memory with the same retry policy as
+    download_image, for callers that pack pages into an archive instead
+    of writing page files.
     """
     for attempt in range(retries):
         try:
@@ -34,73 +139,319 @@ async def download_image(
             response.raise_for_status()
             if not response.content:
                 raise ValueError("Empty image payload")
-
-            with open(path, "wb") as f:
-                f.write(response.content)
-            return True
+            await admission.record_success()
+            return response.content
         except Exception as e:
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            if status == 429:
+                await admission.throttle()
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                console.print(f"[bold red]Unrecoverable HTTP {status} for {url}. Not retrying.[/bold red]")
+                return None
             console.print(f"[bold yellow]Attempt {attempt + 1}/{retries} failed for {url}:[/bold yellow] {e}")
             if attempt < retries - 1:
-                await asyncio.sleep(2 ** attempt)
+                await asyncio.sleep(min(MAX_BACKOFF_SECONDS, (2 ** attempt) * (1 + random.random() * 0.5)))
             else:
                 console.print(f"[bold red]Failed to download image from {url} after {retries} attempts.[/bold red]")
-                return False
+    return None
 
-async def download_chapter(chapter_url: str, manga_title: str, chapter_name: str, overall_progress=None):
+
+def _chapter_progress(overall_progress, local_console):
+    """
+    Returns (progress, owned_context). owned_context is non-None when a
+    standalone Progress was created here and must be exited by the caller.
+    """
+    if overall_progress is not None:
+        return overall_progress, None
+    context = Progress(
+        TextColumn("[bold blue]{task.description}", justify="right"),
+        BarColumn(bar_width=None),
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        TransferSpeedColumn(),
+        "•",
+        TimeRemainingColumn(),
+        console=local_console,
+    )
+    context.__enter__()
+    return context, context
+
+
+async def download_chapter(
+    chapter_url: str,
+    manga_title: str,
+    chapter_name: str,
+    overall_progress=None,
+    client: httpx.AsyncClient | None = None,
+    image_urls: list[str] | None = None,
+    etag_cache: EtagCache | None = None,
+):
     """
     Downloads all images for a given chapter.
+
+    Reuses the given client's connection pool when one is provided; otherwise
+    a client is created for the duration of this chapter only. Callers that
+    have already scraped the chapter page can pass image_urls to skip the
+    scrape here, and a shared EtagCache to enable conditional GETs.
     """
     local_console = overall_progress.console if overall_progress else console
     local_console.print(f"Downloading chapter: [bold blue]{chapter_name}[/bold blue]")
-    
-    # Create directory for the manga and chapter
+
+    # Create directory for the manga and chapter; the plain mkdir avoids
+    # exist_ok's extra stat when the manga root was already made by the
+    # orchestrator (the usual case), with makedirs as standalone fallback
     manga_dir = os.path.join(DOWNLOAD_PATH, sanitize_filename(manga_title))
     chapter_dir = os.path.join(manga_dir, sanitize_filename(chapter_name))
-    os.makedirs(chapter_dir, exist_ok=True)
+    try:
+        os.mkdir(chapter_dir)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(chapter_dir, exist_ok=True)
+
+    own_client = client is None
+    if own_client:
+        client = create_http_client()
+
+    own_cache = etag_cache is None
+    if own_cache:
+        etag_cache = EtagCache(manga_dir)
 
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True) as client:
-        image_urls = await get_image_urls(chapter_url, client=client)
+    try:
+        if image_urls is None:
+            image_urls = await get_image_urls(chapter_url, client=client)
         if not image_urls:
             local_console.print(f"[bold red]No images found for {chapter_name}. Skipping download.[/bold red]")
             return chapter_dir
 
-        progress_context = None
-        if overall_progress is None:
-            progress_context = Progress(
-                TextColumn("[bold blue]{task.description}", justify="right"),
-                BarColumn(bar_width=None),
-                "[progress.percentage]{task.percentage:>3.1f}%",
-                "•",
-                TransferSpeedColumn(),
-                "•",
-                TimeRemainingColumn(),
-                console=local_console,
-            )
-            progress_context.__enter__()
-            progress = progress_context
-        else:
-            progress = overall_progress
-
+        progress, progress_context = _chapter_progress(overall_progress, local_console)
         task = progress.add_task(f"[cyan]Downloading {chapter_name} images...", total=len(image_urls))
-        semaphore = asyncio.Semaphore(MAX_IMAGE_THREADS)
+        completed = 0
+
+        def advance():
+            nonlocal completed
+            completed += 1
+            if completed % PROGRESS_BATCH == 0:
+                progress.update(task, advance=PROGRESS_BATCH)
 
         async def download_single(index: int, img_url: str):
             ext = os.path.splitext(img_url.split("?")[0])[1] or ".jpg"
             img_path = os.path.join(chapter_dir, f"page_{index + 1}{ext}")
-            async with semaphore:
-                ok = await download_image(client, img_url, img_path, chapter_url, RETRY_ATTEMPTS)
-            progress.update(task, advance=1)
+            # Pages completed by a previous run are safe to keep: writes are
+            # atomic. With a cached ETag, revalidate through download_image
+            # instead, which sends If-None-Match and gets a ~free 304 when
+            # the image is unchanged on the CDN.
+            if (
+                os.path.exists(img_path)
+                and os.path.getsize(img_path) > 0
+                and not etag_cache.get(img_url)
+            ):
+                advance()
+                return True
+            async with admission:
+                ok = await download_image(client, img_url, img_path, chapter_url, RETRY_ATTEMPTS, etag_cache)
+            advance()
             return ok
 
         await asyncio.gather(*(download_single(i, url) for i, url in enumerate(image_urls)))
 
+        # Flush the sub-batch remainder so the bar reaches 100%
+        if completed % PROGRESS_BATCH:
+            progress.update(task, advance=completed % PROGRESS_BATCH)
         progress.remove_task(task)
         if progress_context is not None:
             progress_context.__exit__(None, None, None)
+    finally:
+        if own_cache:
+            etag_cache.flush()
+        if own_client:
+            await client.aclose()
 
     local_console.print(f"[bold green]Finished downloading {chapter_name}[/bold green]")
     return chapter_dir
 
+
+async def download_chapter_cbz(
+    chapter_url: str,
+    manga_title: str,
+    chapter_name: str,
+    overall_progress=None,
+    client: httpx.AsyncClient | None = None,
+    image_urls: list[str] | None = None,
+    metadata: dict | None = None,
+):
+    """
+    Downloads a chapter's images straight into a single .cbz archive.
+
+    One archive per chapter means one file created instead of dozens of
+    page files. Pages are stored uncompressed (ZIP_STORED) since JPEG/webp
+    are already compressed, and the archive is built under a .part name
+    and renamed into place on success. Returns the archive path, or None
+    if no images were found.
+    """
+    local_console = overall_progress.console if overall_progress else console
+    local_console.print(f"Downloading chapter: [bold blue]{chapter_name}[/bold blue]")
+
+    manga_dir = os.path.join(DOWNLOAD_PATH, sanitize_filename(manga_title))
+    os.makedirs(manga_dir, exist_ok=True)
+    cbz_path = os.path.join(manga_dir, f"{sanitize_filename(chapter_name)}.cbz")
+    if os.path.exists(cbz_path) and os.path.getsize(cbz_path) > 0:
+        local_console.print(f"[bold green]{chapter_name} already archived. Skipping.[/bold green]")
+        return cbz_path
+
+    own_client = client is None
+    if own_client:
+        client = create_http_client()
+
+    tmp_path = cbz_path + ".part"
+    try:
+        if image_urls is None:
+            image_urls = await get_image_urls(chapter_url, client=client)
+        if not image_urls:
+            local_console.print(f"[bold red]No images found for {chapter_name}. Skipping download.[/bold red]")
+            return None
+
+        progress, progress_context = _chapter_progress(overall_progress, local_console)
+        task = progress.add_task(f"[cyan]Downloading {chapter_name} images...", total=len(image_urls))
+        completed = 0
+
+        def advance():
+            nonlocal completed
+            completed += 1
+            if completed % PROGRESS_BATCH == 0:
+                progress.update(task, advance=PROGRESS_BATCH)
+
+        # ZipFile writes aren't safe to interleave between tasks
+        zip_lock = asyncio.Lock()
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as archive:
+            if metadata:
+                archive.writestr("ComicInfo.xml", create_comic_info_xml(metadata))
+
+            async def download_single(index: int, img_url: str):
+                ext = os.path.splitext(img_url.split("?")[0])[1] or ".jpg"
+                async with admission:
+                    data = await fetch_image_bytes(client, img_url, chapter_url, RETRY_ATTEMPTS)
+                if data is not None:
+                    async with zip_lock:
+                        archive.writestr(f"page_{index + 1}{ext}", data)
+                advance()
+                return data is not None
+
+            results = await asyncio.gather(*(download_single(i, url) for i, url in enumerate(image_urls)))
+
+        if completed % PROGRESS_BATCH:
+            progress.update(task, advance=completed % PROGRESS_BATCH)
+        progress.remove_task(task)
+        if progress_context is not None:
+            progress_context.__exit__(None, None, None)
+
+        if not all(results):
+            # An archive with missing pages must never reach the final name:
+            # the skip check above would make the gap permanent. Leave the
+            # .part for cleanup so a later run retries the whole chapter.
+            local_console.print(f"[bold red]Some pages of {chapter_name} failed. Archive not written.[/bold red]")
+            return None
+
+        os.replace(tmp_path, cbz_path)
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        if own_client:
+            await client.aclose()
+
+    local_console.print(f"[bold green]Finished downloading {chapter_name}[/bold green]")
+    return cbz_path
+
+
+async def download_manga(
+    manga_title: str,
+    chapters: list[dict],
+    overall_progress=None,
+    client: httpx.AsyncClient | None = None,
+    max_chapter_threads: int = MAX_CHAPTER_THREADS,
+    return_exceptions: bool = False,
+    pack_cbz: bool = False,
+    metadata: dict | None = None,
+):
+    """
+    Downloads a batch of chapters concurrently over one shared client.
+    With pack_cbz, each chapter goes straight into a .cbz archive (with
+    ComicInfo.xml built from `metadata`) instead of a directory of pages.
+
+    Chapter-level concurrency is bounded by max_chapter_threads while
+    image-level concurrency stays under the global admission controller,
+    so the total in-flight request count never exceeds the client's pool.
+    A producer scrapes image URLs a couple of chapters ahead of the
+    downloaders, so scraping the next chapter page overlaps with image
+    downloads instead of stalling them.
+    Returns one chapter directory per entry in `chapters`, in order.
+    """
+    own_client = client is None
+    if own_client:
+        client = create_http_client()
+
+    # Make the manga root once so per-chapter mkdir calls never walk parents
+    manga_dir = os.path.join(DOWNLOAD_PATH, sanitize_filename(manga_title))
+    os.makedirs(manga_dir, exist_ok=True)
+    etag_cache = EtagCache(manga_dir)
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    results: list = [None] * len(chapters)
+
+    async def produce():
+        # Sentinels go out even if scraping raises, so consumers never
+        # stay blocked on queue.get() after the producer dies
+        try:
+            for index, chapter in enumerate(chapters):
+                image_urls = await get_image_urls(chapter["url"], client=client)
+                await queue.put((index, chapter, image_urls))
+        finally:
+            for _ in range(max_chapter_threads):
+                await queue.put(None)
+
+    async def consume():
+        while (item := await queue.get()) is not None:
+            index, chapter, image_urls = item
+            try:
+                if pack_cbz:
+                    results[index] = await download_chapter_cbz(
+                        chapter["url"],
+                        manga_title,
+                        chapter["name"],
+                        overall_progress,
+                        client=client,
+                        image_urls=image_urls,
+                        metadata=metadata,
+                    )
+                else:
+                    results[index] = await download_chapter(
+                        chapter["url"],
+                        manga_title,
+                        chapter["name"],
+                        overall_progress,
+                        client=client,
+                        image_urls=image_urls,
+                        etag_cache=etag_cache,
+                    )
+            except Exception as e:
+                results[index] = e
+
+    try:
+        await asyncio.gather(produce(), *(consume() for _ in range(max_chapter_threads)))
+    finally:
+        etag_cache.flush()
+        if own_client:
+            await client.aclose()
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
 if __name__ == "__main__":
     # Example usage for testing
     test_manga_title = "Eleceed"
@@ -1,27 +1,23 @@
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
+
+# ComicInfo.xml fields we emit, in schema order
+_COMIC_INFO_FIELDS = (
+    "Title", "Series", "Number", "Volume", "Summary", "Writer",
+    "Penciller", "Inker", "Colorist", "Letterer", "CoverArtist",
+    "Editor", "Publisher", "Genre", "Web", "Manga",
+)
 
 def create_comic_info_xml(metadata: dict) -> str:
     """
     Creates a ComicInfo.xml string from a metadata dictionary.
     """
     root = ET.Element("ComicInfo")
-    
-    # Add metadata fields
-    fields = [
-        "Title", "Series", "Number", "Volume", "Summary", "Writer", 
-        "Penciller", "Inker", "Colorist", "Letterer", "CoverArtist", 
-        "Editor", "Publisher", "Genre", "Web", "Manga"
-    ]
-    
-    for field in fields:
+
+    for field in _COMIC_INFO_FIELDS:
         if field in metadata and metadata[field]:
             sub_element = ET.SubElement(root, field)
             sub_element.text = str(metadata[field])
 
-    # Pretty print XML
-    xml_str = ET.tostring(root, 'utf-8')
-    dom = minidom.parseString(xml_str)
-    pretty_xml_str = dom.toprettyxml(indent="  ")
-    
-    return pretty_xml_str
\ No newline at end of file
+    # Pretty print in place; avoids the minidom re-parse round trip
+    ET.indent(root, space="  ")
+    return ET.tostring(root, encoding="unicode", xml_declaration=True)
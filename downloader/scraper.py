@@ -1,12 +1,13 @@
 import re
+import math
 import asyncio
 from urllib.parse import urlparse
 
 import httpx
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
 from rich.console import Console
 
-from config import HTTP_TIMEOUT
+from downloader.utils import create_http_client
 
 console = Console()
 
@@ -20,6 +21,11 @@ BASE_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
 }
 
+# Compiled once; these run against multi-megabyte chapter/series pages
+_BOOK_ID_RE = re.compile(r"var\s+bookId\s*=\s*(\d+);")
+_CHAP_IMAGES_RE = re.compile(r"var\s+chapImages\s*=\s*['\"]([^'\"]+)['\"]")
+_CHAPTER_NUM_RE = re.compile(r"Chapter\s+([\d.]+)", re.IGNORECASE)
+
 
 def _build_headers(referer: str | None = None, extra_headers: dict | None = None) -> dict:
     headers = BASE_HEADERS.copy()
@@ -48,9 +54,9 @@ def _extract_manga_slug(url: str) -> str:
     return path.split("/")[0]
 
 
-def _extract_metadata(soup: BeautifulSoup, page_url: str) -> dict:
-    name_box = soup.find("div", class_="name box")
-    manga_title = name_box.find("h1").get_text(strip=True) if name_box else "Unknown Title"
+def _extract_metadata(tree: HTMLParser, page_url: str) -> dict:
+    title_node = tree.css_first("div.name.box h1")
+    manga_title = title_node.text(strip=True) if title_node else "Unknown Title"
 
     metadata = {
         "Title": manga_title,
@@ -59,20 +65,20 @@ def _extract_metadata(soup: BeautifulSoup, page_url: str) -> dict:
         "Manga": "Yes",
     }
 
-    detail_box = soup.find("div", class_="detail-box")
+    detail_box = tree.css_first("div.detail-box")
     if detail_box:
-        summary_div = detail_box.find("div", class_="summary")
+        summary_div = detail_box.css_first("div.summary")
         if summary_div:
-            metadata["Summary"] = summary_div.get_text(" ", strip=True)
+            metadata["Summary"] = summary_div.text(separator=" ", strip=True)
 
-        for p_tag in detail_box.find_all("p"):
-            strong_tag = p_tag.find("strong")
+        for p_tag in detail_box.css("p"):
+            strong_tag = p_tag.css_first("strong")
             if not strong_tag:
                 continue
 
-            key = strong_tag.get_text(strip=True).replace(":", "")
-            full_text = p_tag.get_text(" ", strip=True)
-            key_text = strong_tag.get_text(" ", strip=True)
+            key = strong_tag.text(strip=True).replace(":", "").strip()
+            full_text = p_tag.text(separator=" ", strip=True)
+            key_text = strong_tag.text(separator=" ", strip=True)
             value = full_text.replace(key_text, "", 1).strip(" :")
 
             if key == "Author(s)":
@@ -84,18 +90,18 @@ def _extract_metadata(soup: BeautifulSoup, page_url: str) -> dict:
 
 
 def _extract_book_id(html: str) -> str | None:
-    match = re.search(r"var\s+bookId\s*=\s*(\d+);", html)
+    match = _BOOK_ID_RE.search(html)
     return match.group(1) if match else None
 
 
 def _chapter_number_from_title(title: str) -> float:
-    match = re.search(r"Chapter\s+([\d.]+)", title, re.IGNORECASE)
+    match = _CHAPTER_NUM_RE.search(title)
     if not match:
-        return float("inf")
+        return math.inf
     try:
         return float(match.group(1))
     except ValueError:
-        return float("inf")
+        return math.inf
 
 
 async def _fetch_chapters(client: httpx.AsyncClient, book_id: str) -> list[dict]:
@@ -107,16 +113,18 @@ async def _fetch_chapters(client: httpx.AsyncClient, book_id: str) -> list[dict]
         extra_headers={"X-Requested-With": "XMLHttpRequest"},
     )
 
-    soup = BeautifulSoup(html, "html.parser")
+    # selectolax's lexbor backend keeps parsing cheap on series with
+    # thousands of chapter rows
+    tree = HTMLParser(html)
     chapter_rows = []
 
-    for idx, li in enumerate(soup.find_all("li")):
-        a_tag = li.find("a")
-        strong = li.find("strong", class_="chapter-title")
-        if not a_tag or not strong:
+    for idx, li in enumerate(tree.css("li")):
+        a_tag = li.css_first("a")
+        strong = li.css_first("strong.chapter-title")
+        if a_tag is None or strong is None:
             continue
 
-        href = a_tag.get("href", "").strip()
+        href = (a_tag.attributes.get("href") or "").strip()
         if not href:
             continue
 
@@ -125,7 +133,7 @@ async def _fetch_chapters(client: httpx.AsyncClient, book_id: str) -> list[dict]
         else:
             chapter_url = f"{BASE_URL}{href if href.startswith('/') else '/' + href}"
 
-        title = strong.get_text(strip=True)
+        title = strong.text(strip=True)
         chapter_rows.append(
             {
                 "name": title,
@@ -139,10 +147,13 @@ async def _fetch_chapters(client: httpx.AsyncClient, book_id: str) -> list[dict]
     return [{"name": row["name"], "url": row["url"]} for row in chapter_rows]
 
 
-async def get_manga_details(url: str):
+async def get_manga_details(url: str, client: httpx.AsyncClient | None = None):
     """
     Scrapes manga title, metadata, and chapter URLs from a MangaBuddy series URL.
     """
+    own_client = client is None
+    active_client = client or create_http_client()
+
     try:
         manga_slug = _extract_manga_slug(url)
         if not manga_slug:
@@ -150,18 +161,16 @@ async def get_manga_details(url: str):
 
         series_url = f"{BASE_URL}/{manga_slug}"
 
-        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True) as client:
-            detail_html = await _fetch_text(client, series_url, referer=BASE_URL)
-            soup = BeautifulSoup(detail_html, "html.parser")
-            metadata = _extract_metadata(soup, series_url)
+        detail_html = await _fetch_text(active_client, series_url, referer=BASE_URL)
+        metadata = _extract_metadata(HTMLParser(detail_html), series_url)
 
-            book_id = _extract_book_id(detail_html)
-            if not book_id:
-                console.print("[bold red]Could not find bookId on manga page.[/bold red]")
-                return metadata, []
+        book_id = _extract_book_id(detail_html)
+        if not book_id:
+            console.print("[bold red]Could not find bookId on manga page.[/bold red]")
+            return metadata, []
 
-            chapters = await _fetch_chapters(client, book_id)
-            return metadata, chapters
+        chapters = await _fetch_chapters(active_client, book_id)
+        return metadata, chapters
 
     except httpx.HTTPError as e:
         console.print(f"[bold red]Error fetching URL:[/bold red] {e}")
@@ -169,6 +178,9 @@ async def get_manga_details(url: str):
     except Exception as e:
         console.print(f"[bold red]An unexpected error occurred during scraping manga details:[/bold red] {e}")
         return None, None
+    finally:
+        if own_client:
+            await active_client.aclose()
 
 
 async def get_image_urls(chapter_url: str, client: httpx.AsyncClient | None = None) -> list[str]:
@@ -176,18 +188,19 @@ async def get_image_urls(chapter_url: str, client: httpx.AsyncClient | None = No
     Scrapes image URLs from a MangaBuddy chapter URL by parsing `var chapImages`.
     """
     own_client = client is None
-    active_client = client or httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True)
+    active_client = client or create_http_client()
 
     try:
         html = await _fetch_text(active_client, chapter_url, referer=BASE_URL)
-        match = re.search(r"var\s+chapImages\s*=\s*['\"]([^'\"]+)['\"]", html)
+        match = _CHAP_IMAGES_RE.search(html)
         if not match:
             return []
 
+        # partition is cheaper than a per-URL re.sub for stripping query strings
         return [
-            re.sub(r"\?.*$", "", img.strip())
-            for img in match.group(1).split(",")
-            if img.strip()
+            img.partition("?")[0]
+            for raw in match.group(1).split(",")
+            if (img := raw.strip())
         ]
     except httpx.HTTPError as e:
         console.print(f"[bold red]Error fetching chapter page:[/bold red] {e}")
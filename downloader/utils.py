@@ -0,0 +1,69 @@
+import os
+import json
+
+import httpx
+
+from config import MAX_IMAGE_THREADS, HTTP_TIMEOUT
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Creates the shared httpx.AsyncClient used for all scraping and downloads.
+
+    A single client keeps TCP/TLS connections to mangabuddy.com and its image
+    CDN alive across chapters instead of paying a fresh handshake per chapter.
+    With HTTP/2 the CDN can multiplex a chapter's page downloads over one
+    TLS connection rather than one connection per request.
+    """
+    # Keep the pool ceiling above the admission limit so the admission
+    # controller, not httpx's internal queue, is the gate on concurrency
+    limits = httpx.Limits(
+        max_connections=max(100, MAX_IMAGE_THREADS + 10),
+        max_keepalive_connections=MAX_IMAGE_THREADS,
+        keepalive_expiry=30,
+    )
+    assert MAX_IMAGE_THREADS <= limits.max_connections
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        http2=True,
+        limits=limits,
+    )
+
+
+class EtagCache:
+    """
+    Per-manga ETag store backed by a JSON sidecar in the manga directory.
+
+    Lets repeat runs send If-None-Match so the CDN answers 304 Not
+    Modified for unchanged images instead of resending the body.
+    """
+
+    def __init__(self, manga_dir: str):
+        self._path = os.path.join(manga_dir, ".etags.json")
+        self._dirty = False
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._etags = json.load(f)
+        except (OSError, ValueError):
+            self._etags = {}
+
+    def get(self, url: str) -> str | None:
+        return self._etags.get(url)
+
+    def set(self, url: str, etag: str | None):
+        if etag and self._etags.get(url) != etag:
+            self._etags[url] = etag
+            self._dirty = True
+
+    def flush(self):
+        if not self._dirty:
+            return
+        tmp_path = self._path + ".part"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._etags, f)
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+        except OSError:
+            pass
@@ -12,7 +12,8 @@ from PyQt6.QtGui import QFont, QPalette, QColor, QLinearGradient, QBrush
 
 # Import our existing modules
 from downloader.scraper import get_manga_details
-from downloader.download import download_chapter
+from downloader.download import download_manga
+from downloader.utils import create_http_client
 from downloader.converter import convert_images_to_pdf, convert_images_to_cbz
 from config import DELETE_IMAGES_AFTER_CONVERSION, MAX_CHAPTER_THREADS
 
@@ -641,6 +642,14 @@ class DownloadThread(QThread):
             
     async def download_chapters_async(self):
         """Async function to download chapters concurrently with thread limit"""
+        # One shared client for the whole download so connection pools persist across chapters
+        client = create_http_client()
+        try:
+            await self._download_all(client)
+        finally:
+            await client.aclose()
+
+    async def _download_all(self, client):
         total_chapters = len(self.selected_chapters)
         
         # Create a custom progress tracker
@@ -660,10 +669,7 @@ class DownloadThread(QThread):
                 self.progress_callback(overall_progress, 0)  # Chapter progress will be updated separately
                 
         progress_tracker = ProgressTracker(total_chapters, self.progress_signal.emit, self.log_signal.emit)
-        
-        # Create a semaphore to limit concurrent chapter downloads
-        semaphore = asyncio.Semaphore(self.max_chapter_threads)
-        
+
         # Create a Rich Progress object for concurrent downloads
         console = Console()
         with Progress(
@@ -676,28 +682,16 @@ class DownloadThread(QThread):
         ) as overall_progress:
             overall_task = overall_progress.add_task("[green]Overall Chapter Progress[/green]", total=len(self.selected_chapters))
             
-            # Create download tasks for concurrent execution
-            download_tasks = []
-            
-            # Define a wrapper function to limit concurrent downloads
-            async def download_with_semaphore(chapter):
-                async with semaphore:
-                    return await download_chapter(
-                        chapter['url'],
-                        self.manga_title,
-                        chapter['name'],
-                        overall_progress  # Pass the overall_progress to avoid "Only one live display" error
-                    )
-            
-            # Create tasks for each chapter
-            for chapter in self.selected_chapters:
-                # Create a task for each chapter download
-                task = download_with_semaphore(chapter)
-                download_tasks.append(task)
-                
-            # Download all chapters concurrently using asyncio.gather
+            # Download all chapters concurrently over the shared client
             self.log_signal.emit(f"Starting concurrent download of {len(self.selected_chapters)} chapters (max {self.max_chapter_threads} at a time)...")
-            chapter_dirs = await asyncio.gather(*download_tasks, return_exceptions=True)
+            chapter_dirs = await download_manga(
+                self.manga_title,
+                self.selected_chapters,
+                overall_progress,  # Pass the overall_progress to avoid "Only one live display" error
+                client=client,
+                max_chapter_threads=self.max_chapter_threads,
+                return_exceptions=True,
+            )
             
             # Process downloaded chapters (convert, delete images, etc.)
             for i, (chapter, chapter_dir) in enumerate(zip(self.selected_chapters, chapter_dirs)):
@@ -7,9 +7,10 @@ from rich.table import Table # Import Table
 import asyncio # Import asyncio
 
 from downloader.scraper import get_manga_details
-from downloader.download import download_chapter
+from downloader.download import download_manga
 from downloader.converter import convert_images_to_pdf, convert_images_to_cbz
-from config import MAX_CHAPTER_THREADS, DELETE_IMAGES_AFTER_CONVERSION
+from downloader.utils import create_http_client
+from config import DELETE_IMAGES_AFTER_CONVERSION
 
 app = typer.Typer()
 console = Console()
@@ -22,6 +23,14 @@ async def main_async(): # New async main function
     """
     MangaBuddy Downloader CLI.
     """
+    # One shared client for the whole session so connection pools outlive chapters
+    client = create_http_client()
+    try:
+        await run_downloader(client)
+    finally:
+        await client.aclose()
+
+async def run_downloader(client):
     console.print("[bold green]Welcome to MangaBuddy Downloader![/bold green]")
     while True:
         manga_url = console.input("[bold cyan]Enter MangaBuddy URL:[/bold cyan] ")
@@ -30,7 +39,7 @@ async def main_async(): # New async main function
             continue
 
         with console.status("[bold yellow]Scraping manga details...[/bold yellow]", spinner="dots"):
-            manga_metadata, chapters = await get_manga_details(manga_url)
+            manga_metadata, chapters = await get_manga_details(manga_url, client=client)
 
         if not manga_metadata or not chapters:
             console.print("[bold red]Could not retrieve manga details. Please check the URL or your internet connection.[/bold red]")
@@ -122,6 +131,10 @@ async def main_async(): # New async main function
         else:
             console.print("[bold red]Invalid choice. Please enter 1, 2, or 3.[/bold red]")
 
+    # CBZ output without keeping images can skip the page files entirely and
+    # stream each chapter straight into its archive
+    direct_cbz = conversion_format == "cbz" and delete_images_after_conversion
+
     with Progress(
         TextColumn("[bold blue]{task.description}", justify="right"),
         BarColumn(bar_width=None),
@@ -132,25 +145,25 @@ async def main_async(): # New async main function
     ) as overall_progress:
         overall_task = overall_progress.add_task("[green]Overall Chapter Progress[/green]", total=len(selected_chapters))
 
-        # Create a semaphore to limit concurrent chapter downloads
-        semaphore = asyncio.Semaphore(MAX_CHAPTER_THREADS)
-        
-        # Define a wrapper function to limit concurrent downloads
-        async def download_with_semaphore(chapter):
-            async with semaphore:
-                return await download_chapter(chapter['url'], manga_title, chapter['name'], overall_progress)
-        
-        # Create download tasks for concurrent execution
-        download_tasks = []
-        for chapter in selected_chapters:
-            download_tasks.append(download_with_semaphore(chapter))
-        
-        # Await all download tasks
-        chapter_dirs = await asyncio.gather(*download_tasks)
+        # Download all selected chapters concurrently over the shared client
+        chapter_dirs = await download_manga(
+            manga_title,
+            selected_chapters,
+            overall_progress,
+            client=client,
+            pack_cbz=direct_cbz,
+            metadata=manga_metadata if direct_cbz else None,
+        )
 
         for i, chapter_dir in enumerate(chapter_dirs):
             chapter = selected_chapters[i] # Re-bind chapter for use in this scope
 
+            if direct_cbz:
+                if chapter_dir:
+                    console.print(f"[bold green]Archived {chapter['name']}:[/bold green] {chapter_dir}")
+                overall_progress.update(overall_task, advance=1)
+                continue
+
             if chapter_dir and conversion_format != "none":
                 # Get list of downloaded images
                 image_paths = [os.path.join(chapter_dir, f) for f in os.listdir(chapter_dir) if f.endswith(('.png', '.jpg', '.jpeg'))]